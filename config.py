@@ -34,6 +34,7 @@
 # print(SLACK_BOT_TOKEN)
 
 
+import functools
 import os
 from dotenv import load_dotenv
 import streamlit as st
@@ -49,17 +50,37 @@ SLACK_CHANNEL_ID = os.getenv("SLACK_CHANNEL_ID", "C06L2AG0ZTQ")
 # Timezone (non‑secret config)
 TIMEZONE = os.getenv("TIMEZONE", "America/New_York")
 
-# 1) Try getting the bot token from env (for local dev)
-_env_token = os.getenv("SLACK_BOT_TOKEN")
+# ----- Snowflake connection -----
+
+@st.cache_resource
+def get_snowflake_connection():
+    """Shared Snowflake connection: opened once per process, reused by every caller and rerun"""
+    return st.connection("snowflake")
+
+
+# ----- Slack bot token -----
+
+# 1) Try getting the bot token from env (for local dev); None means "fetch from Snowflake"
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN") or None
+
+
+@functools.lru_cache(maxsize=None)
+def get_slack_bot_token():
+    """
+    Return the Slack bot token, resolving it on first use
+
+    Importing config stays free of Snowflake round-trips; the Snowflake lookup
+    only runs (once) when a token is actually needed and none is set in env.
+    """
+    if SLACK_BOT_TOKEN:
+        return SLACK_BOT_TOKEN
 
-if _env_token:
-    SLACK_BOT_TOKEN = _env_token
-else:
     # 2) Fallback: get the bot token from Snowflake via your secret-backed function
-    conn = st.connection("snowflake")
+    conn = get_snowflake_connection()
     df = conn.query("SELECT PST.PS_UTILIZATION.GET_SLACK_TOKEN() AS TOKEN")
     if df.empty:
         raise RuntimeError("GET_SLACK_TOKEN() returned no rows")
-    SLACK_BOT_TOKEN = df["TOKEN"].iloc[0]
-    if not SLACK_BOT_TOKEN:
-        raise RuntimeError("GET_SLACK_TOKEN() returned an empty token")
\ No newline at end of file
+    token = df["TOKEN"].iloc[0]
+    if not token:
+        raise RuntimeError("GET_SLACK_TOKEN() returned an empty token")
+    return token
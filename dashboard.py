@@ -10,27 +10,40 @@ This Streamlit dashboard displays:
 
 Data flow:
 - SlackMonitor fetches messages from Slack API
-- Messages are filtered by fiscal quarter (FY starts in February)
+- Messages are loaded into a pandas DataFrame and filtered by fiscal quarter (FY starts in February)
 - Top performers are calculated by counting white_check_mark reactions on thread replies
 """
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import io
+import os
 import re
-import pytz
-import plotly.express as px
-from slack_monitor import SlackMonitor
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+from slack_monitor import SlackMonitor, SlackMonitorError, HISTORY_PAGE_SIZE
 import config
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from collections import Counter
+from zoneinfo import ZoneInfo
 
-# Try to import Snowflake for optional message classification feature
-try:
-    import snowflake.connector
-    SNOWFLAKE_AVAILABLE = True
-except (ImportError, AttributeError):
-    SNOWFLAKE_AVAILABLE = False
+# Dashboard timezone, resolved once at startup
+TZ = ZoneInfo(config.TIMEZONE)
+
+# Heavy optional modules are imported where they are used (plotly in the chart helpers,
+# snowflake.connector on the first snowflake_available() call) to keep cold starts fast
+
+
+@functools.lru_cache(maxsize=None)
+def snowflake_available():
+    """Try to import Snowflake (once) for the optional message classification feature"""
+    try:
+        import snowflake.connector
+        return True
+    except (ImportError, AttributeError):
+        return False
 
 # Custom CSS for better executive dashboard styling
 st.markdown("""
@@ -59,21 +72,37 @@ st.markdown("""
 st.set_page_config(page_title="AI Acquisition Dashboard", page_icon="🤖", layout="wide")
 
 
+# All of Slack's markup handled by clean_slack_formatting, as one alternation (one named group per kind)
+SLACK_MARKUP_PATTERN = re.compile(
+    r'(?P<subteam><!subteam\^[^>]+>)'
+    r'|(?P<user><@\w+>)'
+    r'|<https?://[^|>]+\|(?P<link_text>[^>]+)>'
+    r'|<(?P<link>https?://[^>]+)>'
+)
+
+
+def _replace_slack_markup(match):
+    """Replacement for a single SLACK_MARKUP_PATTERN match, chosen by which group matched"""
+    kind = match.lastgroup
+    if kind == 'subteam':
+        return '@AI_Acquisition'
+    if kind == 'user':
+        return ''
+    return match.group(kind)
+
+
+@functools.lru_cache(maxsize=4096)  # Same texts are cleaned again on every rerun
 def clean_slack_formatting(text):
     """
     Remove Slack's special formatting for clean display
     
-    Transformations:
+    Transformations (applied in a single regex pass, memoized per text):
     - <!subteam^ID> (user group mention) -> @AI_Acquisition
     - <@U12345> (user mention) -> removed
     - <http://url|display text> -> display text
     - <http://url> -> http://url
     """
-    text = re.sub(r'<!subteam\^[^>]+>', '@AI_Acquisition', text)
-    text = re.sub(r'<@\w+>', '', text)
-    text = re.sub(r'<https?://[^|>]+\|([^>]+)>', r'\1', text)
-    text = re.sub(r'<(https?://[^>]+)>', r'\1', text)
-    return text.strip()
+    return SLACK_MARKUP_PATTERN.sub(_replace_slack_markup, text).strip()
 
 
 def get_fiscal_quarter(date):
@@ -105,17 +134,15 @@ def get_fiscal_quarter(date):
         fy = year + 1 if month in [11, 12] else year
         return fy, 4, f"FY{fy % 100} Q4"
 
-def get_trailing_quarters(n=4):
+@functools.lru_cache(maxsize=16)
+def trailing_quarters(n, current_fy, current_q):
     """
-    Get list of the last n fiscal quarters (including current)
-    This automatically updates as we move into new quarters.
+    Get the n fiscal quarters ending at (current_fy, current_q), most recent first
     
-    Returns: List of (fiscal_year, quarter_number) tuples
-    """
-    tz = pytz.timezone(config.TIMEZONE)
-    now = datetime.now(tz)
-    current_fy, current_q, _ = get_fiscal_quarter(now)
+    Memoized: the result only changes when the current quarter does.
     
+    Returns: Tuple of (fiscal_year, quarter_number) tuples
+    """
     quarters = []
     fy, q = current_fy, current_q
     for _ in range(n):
@@ -124,25 +151,235 @@ def get_trailing_quarters(n=4):
         if q <= 0:
             q = 4
             fy -= 1
-    return quarters
+    return tuple(quarters)
+
+
+# Sidebar quarter labels: "FY25 Q3" -> ('25', '3')
+QUARTER_LABEL_PATTERN = re.compile(r'FY(\d+) Q(\d)')
+
+# Fiscal calendar as month lookup tables (index = month - 1, Jan first), same rules as get_fiscal_quarter
+FISCAL_QUARTER_BY_MONTH = np.array([4, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4])
+FISCAL_YEAR_OFFSET_BY_MONTH = np.array([0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+
+
+def get_fiscal_quarters(timestamps):
+    """
+    Vectorized get_fiscal_quarter for many timestamps at once
+    
+    Looks every month up in FISCAL_QUARTER_BY_MONTH / FISCAL_YEAR_OFFSET_BY_MONTH with
+    NumPy fancy indexing, so the whole column is mapped in one C-level pass.
+    
+    Returns: MultiIndex of (fiscal_year, quarter_number), one entry per timestamp
+    """
+    ts = pd.DatetimeIndex(timestamps)
+    month_idx = ts.month.to_numpy() - 1
+    fiscal_years = ts.year.to_numpy() + FISCAL_YEAR_OFFSET_BY_MONTH[month_idx]
+    return pd.MultiIndex.from_arrays([fiscal_years, FISCAL_QUARTER_BY_MONTH[month_idx]], names=['fy', 'q'])
+
+
+def filter_by_quarters(messages, quarter_index, quarters):
+    """Filter the messages DataFrame to the given (fiscal_year, quarter) list, using the row positions from index_by_quarter"""
+    positions = [quarter_index[quarter] for quarter in quarters if quarter in quarter_index]
+    if not positions:
+        return messages.iloc[0:0]
+    # Sorted so rows keep their original (newest first) order
+    return messages.iloc[np.sort(np.concatenate(positions))]
+
+
+@st.cache_resource  # One monitor per process so its HTTP connections and user-name cache are reused
+def get_monitor():
+    """Shared SlackMonitor instance (survives Streamlit reruns)"""
+    return SlackMonitor()
+
+
+# On-disk copy of the last successful Slack fetch, so a restarted app doesn't start cold
+MESSAGE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'messages.parquet')
+# Freshness window in seconds: a quarter of the time since the newest message, within these bounds
+MESSAGE_CACHE_MIN_TTL = 60
+MESSAGE_CACHE_MAX_TTL = 1800
+# Columns load_all_messages produces; a copy written before one of these existed is ignored
+MESSAGE_CACHE_COLUMNS = ['timestamp', 'user_id', 'user_name', 'message_text', 'ts', 'reply_count']
+# Channel messages a full scan (no saved copy yet) covers: one conversations_history page
+FULL_SCAN_LIMIT = HISTORY_PAGE_SIZE
+# Refreshes re-fetch this far back (seconds) from the newest cached message, so reply counts
+# on recent threads stay current; older rows are kept from the disk copy as they are
+MESSAGE_REFRESH_LOOKBACK = 7 * 24 * 3600
+
+
+def read_message_cache():
+    """Read the on-disk message cache: (DataFrame, age in seconds), or (None, None) if it is missing or unreadable"""
+    try:
+        age = time.time() - os.path.getmtime(MESSAGE_CACHE_PATH)
+        return pd.read_parquet(MESSAGE_CACHE_PATH, columns=MESSAGE_CACHE_COLUMNS), age
+    except Exception:
+        return None, None
+
+
+def message_cache_ttl(messages):
+    """
+    How long a fetched message set stays fresh, in seconds
+    
+    A channel that has been quiet for hours is unlikely to change in the next few
+    minutes, while one with a message a minute ago probably will: the window is a
+    quarter of the time since the newest message, clamped to
+    MESSAGE_CACHE_MIN_TTL..MESSAGE_CACHE_MAX_TTL.
+    """
+    if messages.empty:
+        return MESSAGE_CACHE_MIN_TTL
+    idle = time.time() - messages['timestamp'].max().timestamp()
+    return min(MESSAGE_CACHE_MAX_TTL, max(MESSAGE_CACHE_MIN_TTL, idle / 4))
+
+
+def write_message_cache(df):
+    """Write the on-disk message cache (best effort: a read-only filesystem just means no disk cache); returns True on success"""
+    try:
+        os.makedirs(os.path.dirname(MESSAGE_CACHE_PATH), exist_ok=True)
+        tmp_path = MESSAGE_CACHE_PATH + '.tmp'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, MESSAGE_CACHE_PATH)
+        return True
+    except Exception:
+        return False
+
+
+@st.cache_resource
+def get_memory_message_copy():
+    """
+    Process-wide stand-in for the disk copy when it can't be written (e.g. read-only filesystem)
+    
+    Holds {'df': DataFrame, 'saved_at': time.time()} of the last complete load, so the
+    freshness window and incremental refreshes still apply without a disk cache.
+    """
+    return {}
 
 
-def filter_by_trailing_quarters(messages, n=4):
-    """Filter messages to only include those from the trailing n quarters"""
-    valid_quarters = set(get_trailing_quarters(n))
-    return [m for m in messages if get_fiscal_quarter(m['timestamp'])[:2] in valid_quarters]
+def read_cached_messages():
+    """The saved message copy as (DataFrame, age in seconds): the disk copy, else the in-process one, else (None, None)"""
+    cached, age = read_message_cache()
+    if cached is None:
+        copy = get_memory_message_copy()
+        if 'df' in copy:
+            cached, age = copy['df'], time.time() - copy['saved_at']
+    return cached, age
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes to avoid hitting Slack API on every refresh
+def save_messages(df):
+    """Save a complete message set to disk, or keep it in process when the disk copy can't be written"""
+    copy = get_memory_message_copy()
+    if write_message_cache(df):
+        copy.clear()
+    else:
+        copy.update(df=df, saved_at=time.time())
+
+
+def messages_frame(messages):
+    """DataFrame of get_ai_acq_messages results, with the MESSAGE_CACHE_COLUMNS columns"""
+    # Build column by column rather than from a list of row dicts; the timestamp column
+    # is derived from the ts strings in one vectorized conversion
+    ts = [m['ts'] for m in messages]
+    return pd.DataFrame({
+        'timestamp': timestamps_from_ts(ts),
+        'user_id': [m['user_id'] for m in messages],
+        'user_name': [m['user_name'] for m in messages],
+        'message_text': [m['message_text'] for m in messages],
+        'ts': ts,
+        'reply_count': [m['reply_count'] for m in messages],
+    })
+
+
+def rescan_all_messages():
+    """
+    Re-fetch the whole span of the saved message copy and replace it (Refresh Data)
+    
+    The rescan starts at the copy's oldest message rather than starting over with a
+    FULL_SCAN_LIMIT full scan, so "All Time" and the quarterly numbers keep covering the
+    same history, and every message's reply_count is re-read. Without a copy this is
+    a regular full scan. If Slack fails, the copy is left as it was.
+    
+    Returns True if the copy was replaced.
+    """
+    cached, _ = read_cached_messages()
+    # Slack's oldest is exclusive: start just before the oldest cached message
+    oldest_ts = cached['ts'].astype(float).min() - 1 if cached is not None else None
+    try:
+        messages = get_monitor().get_ai_acq_messages(
+            limit=FULL_SCAN_LIMIT if oldest_ts is None else None, oldest_ts=oldest_ts)
+    except SlackMonitorError:
+        return False
+    
+    df = messages_frame(messages)
+    if df.empty:
+        return False
+    save_messages(df)
+    return True
+
+
+@st.cache_data(ttl=MESSAGE_CACHE_MIN_TTL)  # Short in-memory cache; the saved copy decides when to hit Slack
 def load_all_messages():
-    """Load all AI Acquisition messages from Slack (cached)"""
-    return SlackMonitor().get_ai_acq_messages(limit=1000)
+    """
+    Load all AI Acquisition messages from Slack (cached)
+    
+    Returns a DataFrame (one row per message, columns as in SlackMonitor.get_ai_acq_messages)
+    with 'timestamp' as a timezone-aware datetime64 column, so everything downstream
+    can work column-wise instead of looping over message dicts.
+    
+    Backed by a parquet copy on disk (see MESSAGE_CACHE_PATH), or an in-process copy when
+    the disk one can't be written (see read_cached_messages / save_messages):
+    - A copy younger than message_cache_ttl() of its contents is returned without calling Slack
+    - An older copy is refreshed incrementally: every message newer than its newest one
+      (minus MESSAGE_REFRESH_LOOKBACK) is fetched, with no scan cap so no gap can open
+      however long the app was down, and merged in
+    - If the Slack scan fails (SlackMonitorError), the last good copy is served instead,
+      however old; with no copy, whatever was fetched before the failure is shown but
+      not saved
+    - reply_count is only re-read inside the lookback window; Refresh Data re-reads the
+      whole copy (see rescan_all_messages)
+    """
+    cached, age = read_cached_messages()
+    if cached is not None and age < message_cache_ttl(cached):
+        return cached
+    
+    oldest_ts = None
+    if cached is not None:
+        oldest_ts = cached['ts'].astype(float).max() - MESSAGE_REFRESH_LOOKBACK
+    
+    complete = True
+    try:
+        # Full scan: newest FULL_SCAN_LIMIT channel messages. Incremental: the whole window, uncapped
+        messages = get_monitor().get_ai_acq_messages(
+            limit=FULL_SCAN_LIMIT if oldest_ts is None else None, oldest_ts=oldest_ts)
+    except SlackMonitorError as e:
+        if cached is not None:
+            return cached
+        messages, complete = e.messages, False
+    
+    df = messages_frame(messages)
+    
+    # A partial scan is shown but never saved. An empty refresh means even the newest cached
+    # message (always inside the window) is gone, e.g. deleted: keep the copy rather than
+    # dropping a week of messages
+    if not complete:
+        return df
+    if df.empty:
+        return cached if cached is not None else df
+    
+    if cached is not None:
+        # Fresh rows first (Slack returns newest first), then the cached rows before the window
+        df = pd.concat([df, cached[cached['ts'].astype(float) <= oldest_ts]], ignore_index=True)
+    save_messages(df)
+    return df
 
 
-@st.cache_data(ttl=300)
-def get_thread_stats(messages, channel_id):
+@st.cache_data(ttl=300, show_spinner=False)  # Runs on a background thread, see start_thread_stats
+def get_thread_stats(message_ts, reply_counts, channel_id):
     """
-    Get detailed thread statistics for executive metrics
+    Get detailed thread statistics for executive metrics and the Top Performers chart
+    
+    message_ts is a tuple of parent message ts strings: the only thing needed to fetch
+    threads, and a small, stable cache key so revisiting a time range is a cache hit.
+    reply_counts (parallel to message_ts) comes from channel history: threads without
+    replies can't have responders or ✅s, so they are never fetched.
+    Every other thread is fetched once and feeds all of the outputs below.
     
     Returns dict with:
     - threads_with_replies: count of threads that have at least 1 reply
@@ -151,22 +388,33 @@ def get_thread_stats(messages, channel_id):
     - response_times: list of response times in minutes
     - responders: set of unique responders
     - active_responders: dict of responder -> reply count
+    - top_performers: dict of responder -> replies with ✅, sorted highest first
     """
-    monitor = SlackMonitor()
+    monitor = get_monitor()
     stats = {
         'threads_with_replies': 0,
         'threads_with_resolution': 0,
         'response_times': [],
         'responders': set(),
         'active_responders': Counter(),
-        'total_threads': len(messages)
+        'total_threads': len(message_ts)
     }
+    top_performers = Counter()
     
-    for msg in messages:
-        try:
-            replies = monitor.client.conversations_replies(
-                channel=channel_id, ts=msg['ts'], limit=1000).get('messages', [])
-        except:
+    # Fetch all threads concurrently, then aggregate here on the main thread.
+    # Every ✅ reply counts towards Top Performers, so threads are paged to the end.
+    replies_by_ts = monitor.get_thread_replies(
+        channel_id, [ts for ts, count in zip(message_ts, reply_counts) if count])
+    
+    # Local aliases for the hot loop below
+    user_name = monitor._get_user_name
+    response_times = stats['response_times']
+    responders = stats['responders']
+    active_responders = stats['active_responders']
+    
+    for ts in message_ts:
+        replies = replies_by_ts.get(ts)
+        if replies is None:
             continue
         
         # Skip parent message, only look at replies
@@ -176,74 +424,171 @@ def get_thread_stats(messages, channel_id):
             stats['threads_with_replies'] += 1
             
             # Calculate response time (time from parent to first reply)
-            parent_ts = float(msg['ts'])
+            parent_ts = float(ts)
             first_reply_ts = float(thread_replies[0].get('ts', parent_ts))
             response_time_minutes = (first_reply_ts - parent_ts) / 60
             if response_time_minutes > 0:
-                stats['response_times'].append(response_time_minutes)
+                response_times.append(response_time_minutes)
             
-            # Track unique responders and their activity
+            # Single pass: track every responder, credit each ✅ reply to its author,
+            # and count the first ✅ as the thread's resolution
+            resolved = False
             for reply in thread_replies:
-                if 'user' in reply:
-                    responder = monitor._get_user_name(reply['user'])
-                    stats['responders'].add(responder)
-                    stats['active_responders'][responder] += 1
+                verified = any(r.get('name') == 'white_check_mark' for r in reply.get('reactions', ()))
+                user_id = reply.get('user')
+                if user_id:
+                    responder = user_name(user_id)
+                    responders.add(responder)
+                    active_responders[responder] += 1
+                    if verified:
+                        top_performers[responder] += 1
                 
-                # Check for resolution (✅ reaction)
-                reactions = reply.get('reactions', [])
-                if any(r.get('name') == 'white_check_mark' for r in reactions):
+                if verified and not resolved:
                     stats['threads_with_resolution'] += 1
-                    break  # Only count once per thread
+                    resolved = True  # Only count once per thread
     
+    stats['top_performers'] = dict(top_performers.most_common())
     return stats
 
 
+@st.cache_resource  # One pool per process, shared by every session
+def get_background_executor():
+    """Worker threads for slow Slack scans, so they don't hold up rendering the rest of the page"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def start_thread_stats(message_ts, reply_counts, channel_id):
+    """
+    Run get_thread_stats in the background and return its Future
+    
+    The job is kept in st.session_state, so reruns (including the polling rerun at the
+    bottom of the page) pick up the running scan; a new one starts only when the
+    selected messages change. Finished results land in get_thread_stats' cache as usual.
+    """
+    key = (message_ts, reply_counts, channel_id)
+    job = st.session_state.get('thread_stats_job')
+    if job is None or job[0] != key:
+        job = (key, get_background_executor().submit(get_thread_stats, *key))
+        st.session_state['thread_stats_job'] = job
+    return job[1]
+
+
+# How long a rerun waits for thread stats before rendering without them (cache hits finish well within this)
+THREAD_STATS_WAIT = 1.0  # Seconds
+
+
+def timestamps_from_ts(message_ts):
+    """Convert Slack ts strings to a DatetimeIndex in the dashboard timezone"""
+    return pd.to_datetime([float(ts) for ts in message_ts], unit='s', utc=True).tz_convert(TZ)
+
+
+@st.cache_data(ttl=300)
+def index_by_quarter(message_ts):
+    """
+    Group message row positions by fiscal quarter (cached)
+    
+    Built once per message set, so switching between quarters in the sidebar is a
+    dict lookup per quarter instead of a pass over every message.
+    
+    Returns: {(fiscal_year, quarter_number): array of row positions in message_ts order}
+    """
+    quarters = get_fiscal_quarters(timestamps_from_ts(message_ts))
+    return pd.Series(np.arange(len(quarters)), index=quarters).groupby(level=['fy', 'q']).indices
+
+
+@st.cache_data(ttl=300)
+def compute_quarterly(message_ts):
+    """
+    Count messages per fiscal quarter (cached)
+    
+    Keyed on the tuple of message timestamps, so reruns over the same messages
+    (every sidebar click) skip the aggregation entirely.
+    
+    Returns: List of ('FYxx Qx', count) tuples, most recent quarter first
+    """
+    quarter_counts = get_fiscal_quarters(timestamps_from_ts(message_ts)).value_counts().sort_index(ascending=False)
+    return [(f"FY{fy % 100} Q{q}", count) for (fy, q), count in quarter_counts.items()]
+
+
+@st.cache_data(ttl=300)
+def compute_activity_counts(message_ts):
+    """
+    Count messages per day of week and per hour of day (cached like compute_quarterly)
+    
+    Returns: (day_data, hour_data) DataFrames with Day/Hour and Requests columns,
+    covering every day (Monday first) and every hour (00:00 first)
+    """
+    timestamps = timestamps_from_ts(message_ts)
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    day_counts = timestamps.day_name().value_counts().reindex(day_order, fill_value=0)
+    hour_counts = timestamps.hour.value_counts().reindex(range(24), fill_value=0)
+    day_data = pd.DataFrame({'Day': day_order, 'Requests': day_counts.to_numpy()})
+    hour_data = pd.DataFrame({'Hour': [f"{h:02d}:00" for h in range(24)], 'Requests': hour_counts.to_numpy()})
+    return day_data, hour_data
+
+
+@st.cache_resource(ttl=86400)
+def get_classification_cache():
+    """
+    Process-wide {cleaned message text: label} memo for CLASSIFY_TEXT results
+
+    A message's label never changes, so overlapping time ranges (and repeated texts)
+    reuse earlier results; the whole memo is dropped once a day.
+    """
+    return {}
+
+
 @st.cache_data(ttl=600)  # Cache for 10 minutes
-def classify_messages_with_snowflake(messages):
+def classify_messages_with_snowflake(message_texts):
     """
     Use Snowflake Cortex CLASSIFY_TEXT to categorize messages
     
+    message_texts is a tuple of raw Slack message texts (a small, stable cache key)
+    
     Classifies each message as either:
     - "Slack Assistance": Help provided through Slack thread
     - "Meeting Assist": Request to join a call or meeting
     
+    Only texts missing from get_classification_cache() are sent to Snowflake.
+    
     Returns: {'slack_assist': count, 'call_assist': count} or None if unavailable
     """
-    import json
-    if not SNOWFLAKE_AVAILABLE or not messages:
+    if not snowflake_available() or not message_texts:
         return None
     
     try:
-        # Use Streamlit's connection method
-        conn = st.connection("snowflake")
-        slack_assist, call_assist = 0, 0
-        
         # Only classify first 50 messages to avoid long processing time
-        for msg in messages[:50]:
-            clean_text = clean_slack_formatting(msg['message_text'])
-            # Escape single quotes for SQL
-            clean_text = clean_text.replace("'", "''")
+        # Identical texts get the same label, so each distinct text is classified once
+        # and its label counted once per occurrence
+        text_counts = Counter(clean_slack_formatting(text) for text in message_texts[:50])
+        labels = get_classification_cache()
+        missing = [text for text in text_counts if text not in labels]
+        
+        if missing:
+            # Reuse the process-wide connection instead of opening a new session
+            conn = config.get_snowflake_connection()
             
-            # Use Streamlit's query method with f-string
+            # Classify every uncached text in one query: one Snowflake round-trip.
+            # Texts are bound as query parameters, so they need no manual quote escaping.
+            values_sql = ", ".join(["(%s)"] * len(missing))
             query = f"""
-            SELECT SNOWFLAKE.CORTEX.CLASSIFY_TEXT(
-                '{clean_text}',
-                ['Slack Assistance', 'Call Assist'],
-                {{'task_description': 'Classify if this is a request for help via Slack thread or a request to join a call'}}
-            ) as classification
+            SELECT t.msg_text AS msg_text,
+                SNOWFLAKE.CORTEX.CLASSIFY_TEXT(
+                    t.msg_text,
+                    ['Slack Assistance', 'Call Assist'],
+                    {{'task_description': 'Classify if this is a request for help via Slack thread or a request to join a call'}}
+                ):label::string AS label
+            FROM VALUES {values_sql} AS t(msg_text)
             """
             
-            result = conn.query(query)
-            
-            if not result.empty:
-                classification = result.iloc[0]['CLASSIFICATION']
-                if isinstance(classification, str):
-                    classification = json.loads(classification)
-                label = classification.get('label', '') if isinstance(classification, dict) else ''
-                if label == 'Slack Assistance':
-                    slack_assist += 1
-                elif label == 'Call Assist':
-                    call_assist += 1
+            result = conn.query(query, params=missing)
+            labels.update(zip(result['MSG_TEXT'], result['LABEL']))
+        
+        counts = Counter()
+        for text, occurrences in text_counts.items():
+            counts[labels.get(text)] += occurrences
+        slack_assist = counts['Slack Assistance']
+        call_assist = counts['Call Assist']
         
         return {'slack_assist': slack_assist, 'call_assist': call_assist}
     except Exception as e:
@@ -266,6 +611,52 @@ def format_response_time(minutes):
         return f"{minutes/1440:.1f}d"
 
 
+@st.cache_data(ttl=300)
+def to_csv_bytes(df):
+    """
+    Encode the message table as CSV once per data version instead of on every rerun
+    
+    Written by pyarrow's C++ CSV writer straight into a bytes buffer, so no
+    intermediate Python str of the whole file is built.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    buffer = io.BytesIO()
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer)
+    return buffer.getvalue()
+
+
+@st.cache_data(ttl=300)
+def bar_chart_json(data, category, value, color_scale, title=None, horizontal=False, height=300, tick_angle=None):
+    """
+    Build a bar chart of data[value] per data[category] and return it as Plotly JSON (cached)
+    
+    Keyed on the chart DataFrame and options, so reruns over unchanged data skip
+    Plotly Express figure construction. Horizontal charts show the value on each bar
+    and are sorted with the highest value on top.
+    """
+    import plotly.express as px
+    if horizontal:
+        fig = px.bar(data, x=value, y=category, orientation='h', title=title,
+                     color=value, color_continuous_scale=color_scale, text=value)
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+        fig.update_traces(textposition='outside')
+    else:
+        fig = px.bar(data, x=category, y=value, title=title,
+                     color=value, color_continuous_scale=color_scale)
+    fig.update_layout(height=height, showlegend=False)
+    if tick_angle is not None:
+        fig.update_layout(xaxis_tickangle=tick_angle)
+    return fig.to_json()
+
+
+def show_bar_chart(data, category, value, color_scale, **options):
+    """Render a bar chart built by bar_chart_json"""
+    import plotly.io as pio
+    fig = pio.from_json(bar_chart_json(data, category, value, color_scale, **options))
+    st.plotly_chart(fig, use_container_width=True)
+
+
 
 
 # ==================== HEADER ====================
@@ -277,51 +668,54 @@ st.markdown("---")
 st.sidebar.title("⚙️ Settings")
 
 # Get current fiscal quarter to build dropdown options
-tz = pytz.timezone(config.TIMEZONE)
-now = datetime.now(tz)
+now = datetime.now(TZ)
 current_fy, current_q, _ = get_fiscal_quarter(now)
 
+# Last 8 quarters, computed once per rerun and reused by the filters and trend comparison below
+recent_quarters = trailing_quarters(8, current_fy, current_q)
+
 # Build list of last 8 quarters (e.g., ["All Time", "FY25 Q4", "FY25 Q3", ...])
 quarter_options = ["Trailing 4 Quarters", "All Time"]
-for i in range(8):
-    target_q, years_back = current_q - i, 0
-    # Handle quarter wraparound (Q0 -> Q4 of previous year)
-    while target_q <= 0:
-        target_q += 4
-        years_back += 1
-    quarter_options.append(f"FY{(current_fy - years_back) % 100} Q{target_q}")
+quarter_options += [f"FY{fy % 100} Q{q}" for fy, q in recent_quarters]
 
 time_range = st.sidebar.selectbox("Time Range", quarter_options, index=0)
 
-# Manual refresh button clears cache and reloads data
+# Manual refresh button re-fetches every saved message, then clears the in-memory caches
 if st.sidebar.button("🔄 Refresh Data"):
+    with st.spinner("Re-fetching messages from Slack..."):
+        rescan_all_messages()
     st.cache_data.clear()
+    st.session_state.pop('thread_stats_job', None)
     st.rerun()
 
 # ==================== LOAD AND FILTER MESSAGES ====================
 with st.spinner("Loading messages from Slack..."):
     all_messages = load_all_messages()
 
+# Row positions of every fiscal quarter, built once per message set
+all_ts = tuple(all_messages['ts'])
+quarter_index = index_by_quarter(all_ts)
+
 # Filter messages by selected time range
 if time_range == "All Time":
     filtered_messages = all_messages
 elif time_range == "Trailing 4 Quarters":
-    filtered_messages = filter_by_trailing_quarters(all_messages, n=4)
+    filtered_messages = filter_by_quarters(all_messages, quarter_index, recent_quarters[:4])
 else:
     # Parse "FY25 Q3" -> fiscal_year=2025, quarter=3
-    match = re.match(r'FY(\d+) Q(\d)', time_range)
+    match = QUARTER_LABEL_PATTERN.match(time_range)
     if match:
         fy, q = int(match.group(1)) + 2000, int(match.group(2))
         # Keep only messages matching selected fiscal quarter
-        filtered_messages = [m for m in all_messages if get_fiscal_quarter(m['timestamp'])[:2] == (fy, q)]
+        filtered_messages = filter_by_quarters(all_messages, quarter_index, [(fy, q)])
     else:
         filtered_messages = all_messages
 
 # ==================== CLASSIFY MESSAGES (IF SNOWFLAKE AVAILABLE) ====================
 classification = None
-if SNOWFLAKE_AVAILABLE and filtered_messages:
+if snowflake_available() and not filtered_messages.empty:
     with st.spinner("Classifying messages with Snowflake Cortex..."):
-        classification = classify_messages_with_snowflake(filtered_messages)
+        classification = classify_messages_with_snowflake(tuple(filtered_messages['message_text']))
 
 # ==================== DISPLAY METRICS ====================
 # Show 3 columns if Snowflake classification is available, otherwise just 1
@@ -340,10 +734,23 @@ if classification:
 
 
 # ==================== GET THREAD STATS FOR EXECUTIVE METRICS ====================
+# Thread scans are slow on a cold cache, so they run in the background: the page renders
+# without thread metrics until the scan finishes, then reruns itself to fill them in
 thread_stats = None
-if filtered_messages:
+thread_stats_pending = False
+if not filtered_messages.empty:
+    thread_stats_future = start_thread_stats(
+        tuple(filtered_messages['ts']), tuple(filtered_messages['reply_count']), config.SLACK_CHANNEL_ID)
     with st.spinner("Analyzing thread engagement..."):
-        thread_stats = get_thread_stats(filtered_messages, config.SLACK_CHANNEL_ID)
+        wait([thread_stats_future], timeout=THREAD_STATS_WAIT)
+    if not thread_stats_future.done():
+        thread_stats_pending = True
+    elif thread_stats_future.exception() is not None:
+        # Drop the failed job so the next rerun starts a fresh scan instead of re-raising this one
+        st.session_state.pop('thread_stats_job', None)
+        st.error(f"Could not analyze thread engagement: {thread_stats_future.exception()}")
+    else:
+        thread_stats = thread_stats_future.result()
 
 # ==================== EXECUTIVE SUMMARY METRICS (ROW 1) ====================
 st.subheader("📊 Executive Summary")
@@ -351,22 +758,22 @@ st.subheader("📊 Executive Summary")
 # Get previous period data for trend calculation
 if time_range == "Trailing 4 Quarters":
     # Compare to previous 4 quarters
-    prev_quarters = get_trailing_quarters(8)[4:]  # Quarters 5-8
-    prev_messages = [m for m in all_messages if get_fiscal_quarter(m['timestamp'])[:2] in set(prev_quarters)]
+    prev_quarters = recent_quarters[4:]  # Quarters 5-8
+    prev_messages = filter_by_quarters(all_messages, quarter_index, prev_quarters)
 elif time_range != "All Time":
     # Compare to same quarter previous year
-    match = re.match(r'FY(\d+) Q(\d)', time_range)
+    match = QUARTER_LABEL_PATTERN.match(time_range)
     if match:
         fy, q = int(match.group(1)) + 2000 - 1, int(match.group(2))  # Previous year
-        prev_messages = [m for m in all_messages if get_fiscal_quarter(m['timestamp'])[:2] == (fy, q)]
+        prev_messages = filter_by_quarters(all_messages, quarter_index, [(fy, q)])
     else:
-        prev_messages = []
+        prev_messages = all_messages.iloc[0:0]
 else:
-    prev_messages = []
+    prev_messages = all_messages.iloc[0:0]
 
 # Calculate trend
 trend_delta = None
-if prev_messages and filtered_messages:
+if not prev_messages.empty and not filtered_messages.empty:
     trend_delta = calculate_qoq_change(len(filtered_messages), len(prev_messages))
 
 # Row 1: Key Volume Metrics
@@ -378,7 +785,7 @@ with col1:
               help=f"AI Acquisition requests in {time_range}")
 
 with col2:
-    unique_requesters = len(set(m['user_name'] for m in filtered_messages)) if filtered_messages else 0
+    unique_requesters = filtered_messages['user_name'].nunique()
     st.metric("👥 Unique Requesters", unique_requesters,
               help="Number of unique team members asking for help")
 
@@ -393,18 +800,24 @@ if thread_stats:
         st.metric("✅ Resolution Rate", f"{resolution_rate:.1f}%",
                   help="Percentage of requests with verified answers (✅)")
 
+if thread_stats_pending:
+    st.caption("⏳ Analyzing thread engagement... response and resolution metrics will appear shortly.")
+
 # Row 2: Response Time and Team Metrics
 st.markdown("")  # Spacing
 col5, col6, col7, col8 = st.columns(4)
 
 if thread_stats:
+    # One array shared by mean and median (np.median selects via partition, no full sort)
+    response_times = np.asarray(thread_stats['response_times'], dtype=np.float64)
+    
     with col5:
-        avg_response = sum(thread_stats['response_times']) / len(thread_stats['response_times']) if thread_stats['response_times'] else 0
+        avg_response = response_times.mean() if response_times.size else 0
         st.metric("⏱️ Avg Response Time", format_response_time(avg_response),
                   help="Average time to first response")
     
     with col6:
-        median_response = sorted(thread_stats['response_times'])[len(thread_stats['response_times'])//2] if thread_stats['response_times'] else 0
+        median_response = np.median(response_times) if response_times.size else 0
         st.metric("⏱️ Median Response", format_response_time(median_response),
                   help="Median time to first response")
     
@@ -422,142 +835,96 @@ if classification:
 st.markdown("---")
 
 # ==================== QUARTERLY BREAKDOWN WITH TRENDS ====================
-if filtered_messages:
+if not filtered_messages.empty:
     st.subheader("📅 Quarterly Performance")
     
-    # Count messages per fiscal quarter
-    quarterly_data = {}
-    for msg in all_messages:  # Use all_messages to show full history
-        fy, q, name = get_fiscal_quarter(msg['timestamp'])
-        if name not in quarterly_data:
-            quarterly_data[name] = {'count': 0, 'fy': fy, 'q': q}
-        quarterly_data[name]['count'] += 1
-    
-    # Sort by fiscal year and quarter (most recent first)
-    sorted_quarters = sorted(quarterly_data.items(), key=lambda x: (x[1]['fy'], x[1]['q']), reverse=True)
+    # Count messages per fiscal quarter (use all messages to show full history),
+    # sorted by fiscal year and quarter (most recent first)
+    sorted_quarters = compute_quarterly(all_ts)
     
     # Show trailing 4 quarters with trend arrows
     cols = st.columns(4)
-    for idx, (name, data) in enumerate(sorted_quarters[:4]):
+    for idx, (name, count) in enumerate(sorted_quarters[:4]):
         # Calculate QoQ change
         prev_q_idx = idx + 1
         delta = None
         if prev_q_idx < len(sorted_quarters):
-            prev_count = sorted_quarters[prev_q_idx][1]['count']
+            prev_count = sorted_quarters[prev_q_idx][1]
             if prev_count > 0:
-                delta = f"{((data['count'] - prev_count) / prev_count * 100):+.0f}%"
+                delta = f"{((count - prev_count) / prev_count * 100):+.0f}%"
         
-        cols[idx].metric(name, data['count'], delta=delta, 
+        cols[idx].metric(name, count, delta=delta, 
                         help=f"Requests in {name}" + (f" ({delta} vs prior quarter)" if delta else ""))
     
 
 # ==================== ACTIVITY HEATMAP ====================
-if filtered_messages:
+if not filtered_messages.empty:
     st.subheader("🗓️ Activity Patterns")
     
     col_heat, col_dist = st.columns(2)
+    day_data, hour_data = compute_activity_counts(tuple(filtered_messages['ts']))
     
     with col_heat:
-        # Day of week activity
-        day_counts = Counter()
-        for msg in filtered_messages:
-            day_name = msg['timestamp'].strftime('%A')
-            day_counts[day_name] += 1
-        
-        # Order days correctly
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_data = pd.DataFrame([
-            {'Day': day, 'Requests': day_counts.get(day, 0)}
-            for day in day_order
-        ])
-        
-        fig = px.bar(day_data, x='Day', y='Requests',
-                    title='Requests by Day of Week',
-                    color='Requests', color_continuous_scale='Blues')
-        fig.update_layout(height=300, showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        # Day of week activity, in calendar order
+        show_bar_chart(day_data, 'Day', 'Requests', 'Blues', title='Requests by Day of Week')
     
     with col_dist:
         # Hour of day activity
-        hour_counts = Counter()
-        for msg in filtered_messages:
-            hour = msg['timestamp'].hour
-            hour_counts[hour] += 1
-        
-        hour_data = pd.DataFrame([
-            {'Hour': f"{h:02d}:00", 'Requests': hour_counts.get(h, 0)}
-            for h in range(24)
-        ])
-        
-        fig = px.bar(hour_data, x='Hour', y='Requests',
-                    title='Requests by Hour of Day',
-                    color='Requests', color_continuous_scale='Blues')
-        fig.update_layout(height=300, showlegend=False, xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
+        show_bar_chart(hour_data, 'Hour', 'Requests', 'Blues', title='Requests by Hour of Day', tick_angle=-45)
     
     st.markdown("---")
 
 
 # ==================== TOP PERFORMERS CHART ====================
-if filtered_messages:
+if not filtered_messages.empty:
     st.subheader("🏆 Top Performers")
     st.caption("Based on answers with ✅ reactions")
     
-    # Calculate scores by checking thread replies for white_check_mark reactions
-    with st.spinner("Analyzing thread replies..."):
-        top_performers = SlackMonitor().get_top_performers(filtered_messages, config.SLACK_CHANNEL_ID)
+    # Scores come from the same thread scan as the executive metrics
+    top_performers = thread_stats['top_performers'] if thread_stats else None
     
-    if top_performers:
+    if thread_stats_pending:
+        st.info("⏳ Analyzing thread replies... the leaderboard will appear shortly.")
+    elif thread_stats is None:
+        st.info("Thread data is unavailable right now (see the error above).")
+    elif top_performers:
         # Create horizontal bar chart with top 10 performers
         df = pd.DataFrame(list(top_performers.items())[:10], columns=['Performer', 'Answers with ✅'])
-        fig = px.bar(df, x='Answers with ✅', y='Performer', orientation='h',
-                     title='Top 10 Contributors', color='Answers with ✅',
-                     color_continuous_scale='Blues', text='Answers with ✅')
-        # Sort bars by value (lowest at bottom, highest at top)
-        fig.update_layout(yaxis={'categoryorder': 'total ascending'}, showlegend=False, height=400)
-        fig.update_traces(textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        show_bar_chart(df, 'Performer', 'Answers with ✅', 'Blues',
+                       title='Top 10 Contributors', horizontal=True, height=400)
     else:
         st.info("No verified answers found.")
     st.markdown("---")
 
 # ==================== REQUESTER INSIGHTS ====================
-if filtered_messages:
+if not filtered_messages.empty:
     st.subheader("📈 Top 10 Requesters")
     
     # Top requesters
-    requester_counts = Counter(m['user_name'] for m in filtered_messages)
-    top_requesters = pd.DataFrame([
-        {'Requester': name, 'Requests': count}
-        for name, count in requester_counts.most_common(10)
-    ])
-    
-    fig = px.bar(top_requesters, x='Requests', y='Requester', orientation='h',
-                color='Requests', color_continuous_scale='Oranges',
-                text='Requests')
-    fig.update_layout(yaxis={'categoryorder': 'total ascending'}, showlegend=False, height=400)
-    fig.update_traces(textposition='outside')
-    st.plotly_chart(fig, use_container_width=True)
+    top_requesters = (filtered_messages['user_name'].value_counts().head(10)
+                      .rename_axis('Requester').reset_index(name='Requests'))
+    
+    show_bar_chart(top_requesters, 'Requester', 'Requests', 'Oranges', horizontal=True, height=400)
     
     st.markdown("---")
 
 # ==================== MESSAGE TABLE ====================
-if filtered_messages:
+if not filtered_messages.empty:
     st.subheader(f"📋 Messages ({len(filtered_messages)} total)")
     
-    # Build table data with cleaned message text
-    df = pd.DataFrame([{
-        'Date': m['timestamp'].strftime('%Y-%m-%d'),
-        'Time': m['timestamp'].strftime('%H:%M'),
-        'User': m['user_name'],
-        'Message': clean_slack_formatting(m['message_text'])
-    } for m in filtered_messages])
+    # Build table data with cleaned message text (dates formatted column-wise, not per row)
+    df = pd.DataFrame({
+        'Date': filtered_messages['timestamp'].dt.strftime('%Y-%m-%d'),
+        'Time': filtered_messages['timestamp'].dt.strftime('%H:%M'),
+        'User': filtered_messages['user_name'],
+        'Message': filtered_messages['message_text'].map(clean_slack_formatting)
+    }).reset_index(drop=True)
     
     st.dataframe(df, use_container_width=True, height=500)
     
     # CSV download button
     st.markdown("---")
-    st.download_button("📥 Download CSV", df.to_csv(index=False),
+    st.download_button("📥 Download CSV", to_csv_bytes(df),
                        f"ai_acquisition_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", "text/csv")
 else:
     st.warning(f"No messages found in {time_range}.")
@@ -566,3 +933,8 @@ else:
 st.markdown("---")
 st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Data: {time_range}")
 
+# Thread stats still running in the background: check again shortly
+if thread_stats_pending:
+    time.sleep(THREAD_STATS_WAIT)
+    st.rerun()
+
@@ -7,74 +7,283 @@ This module connects to Slack API to:
 3. Calculate which team members have the most verified answers
 """
 
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 import config
 
+logger = logging.getLogger(__name__)
+
+# Calls per minute we allow ourselves for Slack methods that get paged through in bulk
+# (Tier 3 is ~50/min); _call spaces these out instead of waiting to be rate limited
+RATE_LIMITS = {'conversations_history': 50}
+
+# Messages per conversations_history call: the documented maximum (999), so long scans need
+# as few round-trips as possible
+HISTORY_PAGE_SIZE = 999
+
+
+class SlackMonitorError(Exception):
+    """A Slack call failed partway through a scan; `messages` holds what was fetched before it"""
+    def __init__(self, message, messages=()):
+        super().__init__(message)
+        self.messages = list(messages)
+
+
 class SlackMonitor:
     def __init__(self):
-        # Initialize Slack client with bot token from .env
-        self.client = WebClient(token=config.SLACK_BOT_TOKEN)
-        self.timezone = pytz.timezone(config.TIMEZONE)
+        # Initialize Slack client with bot token from .env or Snowflake (one client, reused for every call)
+        self.client = WebClient(token=config.get_slack_bot_token(), timeout=30)
+        self.timezone = ZoneInfo(config.TIMEZONE)
         # This is the Slack user group ID for @ai_acq - find yours in Slack admin
         self.ai_acq_group_id = 'S06TG9U38ET'
+        # Slack's internal format for user group mentions, built once for every scan
+        self.ai_acq_mention = f"<!subteam^{self.ai_acq_group_id}"
+        # user_id -> display name (or 'Unknown'), so each user costs at most one users.info call
+        self._user_names = {}
+        # users.list is loaded into _user_names on the first lookup, not here, so constructing is free
+        self._user_names_loaded = False
+        self._user_names_lock = threading.Lock()
+        # method name -> (tokens left, time of last update), see _throttle
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
 
-    def get_ai_acq_messages(self, limit=1000):
+    def get_ai_acq_messages(self, limit=1000, oldest_ts=None, latest_ts=None):
         """
         Fetch all messages that mention @ai_acq user group
         
+        How it works:
+        - Pass 1: collect everything iter_ai_acq_messages yields (same arguments); this only
+          calls conversations_history, so paging is never held up by user lookups
+        - Pass 2: _hydrate adds timestamps and author names
+        - Returns list of message dicts with timestamp, user info, text and reply count
+        - Raises SlackMonitorError if the scan fails; its `messages` are the hydrated
+          messages fetched before the failure
+        """
+        messages = []
+        try:
+            for msg in self.iter_ai_acq_messages(limit, oldest_ts, latest_ts):
+                messages.append(msg)
+        except SlackMonitorError as e:
+            e.messages = self._hydrate(messages)
+            raise
+        return self._hydrate(messages)
+
+    def _hydrate(self, messages):
+        """
+        Add 'timestamp' and 'user_name' to raw rows from iter_ai_acq_messages (in place)
+        
+        Each distinct author is resolved once, in parallel. Returns the same list.
+        """
+        # Look up every distinct author concurrently (mostly cache hits after the first users.list)
+        user_ids = list({msg['user_id'] for msg in messages})
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            names = dict(zip(user_ids, executor.map(self._get_user_name, user_ids)))
+        
+        # Local aliases for the per-message loop below
+        fromtimestamp, tz = datetime.fromtimestamp, self.timezone
+        for msg in messages:
+            msg['timestamp'] = fromtimestamp(float(msg['ts']), tz=tz)
+            msg['user_name'] = names[msg['user_id']]
+        return messages
+
+    def iter_ai_acq_messages(self, limit=1000, oldest_ts=None, latest_ts=None):
+        """
+        Yield messages that mention @ai_acq user group as the channel history is paged
+        
         How it works:
         - Slack stores user group mentions as <!subteam^GROUP_ID> in message text
-        - We paginate through channel history looking for this pattern
-        - Returns list of message dicts with timestamp, user info, and text
+        - We paginate through channel history (newest first) looking for this pattern,
+          scanning at most `limit` channel messages (limit=None: no cap, scan the whole
+          oldest_ts..latest_ts window)
+        - oldest_ts / latest_ts (Unix timestamps) restrict the scan to a time window;
+          Slack applies them server-side, so messages outside it are never downloaded
+        - Pages are prefetched: the request for page N+1 is in flight while page N is
+          filtered, so Slack latency overlaps the Python work; a caller that stops
+          early skips every page after the one already in flight
+        - Rate limits are waited out (see _call); any other failure is logged and
+          raised as SlackMonitorError, after the messages yielded up to that point
+        - Yields lightweight message dicts: user_id, text, ts and reply count.
+          Rows stay raw so a caller that only counts or reads text pays for nothing
+          else; get_ai_acq_messages adds the timestamp and user_name
         """
-        # Slack's internal format for user group mentions
-        search_pattern = f"<!subteam^{self.ai_acq_group_id}"
-        messages, cursor, total = [], None, 0
+        search_pattern = self.ai_acq_mention
+        total, page_index, cursor = 0, 0, None
         
-        try:
-            while total < limit:
-                # Fetch batch of messages (max 200 per API call)
-                response = self.client.conversations_history(
-                    channel=config.SLACK_CHANNEL_ID, limit=min(200, limit - total), cursor=cursor)
+        def page_size():
+            return HISTORY_PAGE_SIZE if limit is None else min(HISTORY_PAGE_SIZE, limit - total)
+
+        def fetch(cursor, page_size):
+            # Fetch batch of messages (up to HISTORY_PAGE_SIZE per API call)
+            return self._call(
+                self.client.conversations_history, channel=config.SLACK_CHANNEL_ID, limit=page_size, cursor=cursor,
+                oldest=oldest_ts, latest=latest_ts)
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(fetch, cursor, page_size())
+            while next_page is not None:
+                try:
+                    response = next_page.result()
+                except (SlackApiError, OSError) as e:
+                    logger.warning("conversations_history failed (page=%d, cursor=%s)",
+                                   page_index, cursor, exc_info=True)
+                    raise SlackMonitorError(f"Slack history scan failed on page {page_index}: {e}") from e
+                page_index += 1
+                page = response.get('messages', [])
+                total += len(page)
+
+                # Check if there are more messages to fetch, and start on them right away
+                cursor = response.get('response_metadata', {}).get('next_cursor')
+                next_page = None
+                if response.get('has_more') and cursor and (limit is None or total < limit):
+                    next_page = executor.submit(fetch, cursor, page_size())
                 
-                for msg in response.get('messages', []):
-                    total += 1
-                    # Only include messages from users (not bots) that mention @ai_acq
-                    if 'user' in msg and 'text' in msg and search_pattern in msg['text']:
-                        messages.append({
-                            'timestamp': datetime.fromtimestamp(float(msg['ts']), tz=self.timezone),
-                            'user_id': msg['user'],
-                            'user_name': self._get_user_name(msg['user']),
-                            'message_text': msg['text'],
-                            'ts': msg['ts']  # Thread timestamp - needed to fetch replies
-                        })
+                for msg in page:
+                    # Only include messages from users (not bots) that mention @ai_acq;
+                    # a plain substring test is already a single C-level scan per message
+                    user, text = msg.get('user'), msg.get('text')
+                    if user and text and search_pattern in text:
+                        yield {
+                            'user_id': user,
+                            'message_text': text,
+                            'ts': msg['ts'],  # Thread timestamp - needed to fetch replies
+                            'reply_count': msg.get('reply_count', 0)  # 0 means there is no thread to fetch
+                        }
+
+    def _call(self, method, **kwargs):
+        """
+        Call a Slack Web API method (e.g. self.client.users_info), waiting out rate limits
+        
+        A rate-limited call is retried after the Retry-After delay Slack sends with it;
+        any other SlackApiError is raised to the caller.
+        """
+        while True:
+            self._throttle(method.__name__)
+            try:
+                return method(**kwargs)
+            except SlackApiError as e:
+                if e.response.get('error') != 'ratelimited':
+                    raise
+                time.sleep(int(e.response.headers.get('Retry-After', 1)))
+
+    def _throttle(self, name):
+        """
+        Token bucket for the methods in RATE_LIMITS: wait until a call to `name` is allowed
+        
+        The bucket holds a full minute's allowance, so short scans run at full speed and
+        only long pagination runs get spaced out to the allowed rate.
+        """
+        per_minute = RATE_LIMITS.get(name)
+        if per_minute is None:
+            return
+        rate = per_minute / 60
+        with self._buckets_lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(name, (per_minute, now))
+            tokens = min(per_minute, tokens + (now - updated) * rate)
+            wait = max(0, (1 - tokens) / rate)
+            # Reserve this call's token now, so concurrent callers queue up behind it
+            self._buckets[name] = (tokens + wait * rate - 1, now + wait)
+        if wait:
+            time.sleep(wait)
+
+    @staticmethod
+    def _display_name(user):
+        """Name shown for a Slack user object: real name, else handle (users without a real name set have '')"""
+        return user.get('real_name') or user.get('name') or 'Unknown'
+
+    def _load_user_names(self):
+        """
+        Fill the user-name cache from users.list
+        
+        One paginated call covers the whole workspace, instead of one users.info call
+        per distinct author. If a page fails, whoever is missing is looked up one by
+        one in _get_user_name as before.
+        """
+        cursor = None
+        try:
+            while True:
+                response = self._call(self.client.users_list, limit=1000, cursor=cursor)
+                for user in response.get('members', []):
+                    self._user_names[user['id']] = self._display_name(user)
                 
-                # Check if there are more messages to fetch
                 cursor = response.get('response_metadata', {}).get('next_cursor')
-                if not response.get('has_more') or not cursor:
+                if not cursor:
                     break
-            return messages
-        except SlackApiError as e:
-            print(f"Error: {e}")
-            return []
+        except (SlackApiError, OSError):
+            logger.warning("users.list failed; falling back to users.info per user", exc_info=True)
 
     def _get_user_name(self, user_id):
         """Convert Slack user ID (e.g., U12345) to display name (e.g., 'John Smith')"""
+        if user_id in self._user_names:
+            return self._user_names[user_id]
+        if not self._user_names_loaded:
+            # First miss: fetch the whole directory once (other threads wait for it here)
+            with self._user_names_lock:
+                if not self._user_names_loaded:
+                    try:
+                        self._load_user_names()
+                    finally:
+                        # Attempted once either way; misses from here on go to users.info
+                        self._user_names_loaded = True
+            if user_id in self._user_names:
+                return self._user_names[user_id]
         try:
-            response = self.client.users_info(user=user_id)
-            return response['user'].get('real_name', response['user'].get('name', 'Unknown'))
-        except:
-            return 'Unknown'
+            response = self._call(self.client.users_info, user=user_id)
+            name = self._display_name(response['user'])
+        except Exception:
+            logger.warning("Could not resolve Slack user %s", user_id, exc_info=True)
+            name = 'Unknown'
+        # Failures are cached too, so an unresolvable ID is not retried on every message
+        self._user_names[user_id] = name
+        return name
+
+    def get_thread_replies(self, channel_id, thread_ts_list, max_workers=16):
+        """
+        Fetch the replies of many threads concurrently
+
+        How it works:
+        - Each thread needs its own conversations_replies calls, so this is network-bound
+        - Calls are fanned out over a thread pool and collected as they complete
+        - Each thread is paged 200 replies at a time, to the end
+        - Rate-limited calls wait for Slack's Retry-After header and are retried (see _call)
+        - Returns {thread_ts: [parent, reply, ...]}; threads that fail are left out
+        """
+        def fetch(ts):
+            thread, cursor = [], None
+            while True:
+                response = self._call(
+                    self.client.conversations_replies, channel=channel_id, ts=ts, limit=200, cursor=cursor)
+                page = response.get('messages', [])
+                # Slack repeats the parent message at the top of every page
+                thread.extend(page if not thread else [m for m in page if m.get('ts') != ts])
+
+                cursor = response.get('response_metadata', {}).get('next_cursor')
+                if not response.get('has_more') or not cursor:
+                    return thread
+
+        replies = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, ts): ts for ts in thread_ts_list}
+            for future in as_completed(futures):
+                try:
+                    replies[futures[future]] = future.result()
+                except Exception:
+                    logger.warning("Could not fetch replies for thread %s", futures[future], exc_info=True)
+        return replies
 
     def get_top_performers(self, messages, channel_id):
         """
         Calculate top performers based on verified answers (✅ reactions)
         
         Logic:
-        1. For each message that mentions @ai_acq, fetch all thread replies
+        1. For each message that mentions @ai_acq, fetch all thread replies (in parallel)
         2. Check each reply for a :white_check_mark: reaction
         3. If a reply has the checkmark, give that user a point
         4. Return sorted dict of {user_name: count}
@@ -83,14 +292,16 @@ class SlackMonitor:
         Hannah gets +1 point in the leaderboard
         """
         
-        scores = {}
+        scores = Counter()
+        
+        # Fetch all threads concurrently (a few workers is enough to hide Slack latency);
+        # messages without replies have nothing to score, so their threads are skipped
+        replies_by_ts = self.get_thread_replies(
+            channel_id, [msg['ts'] for msg in messages if msg.get('reply_count', 0)], max_workers=8)
         
         for msg in messages:
-            try:
-                # Fetch all replies in this message's thread
-                replies = self.client.conversations_replies(
-                    channel=channel_id, ts=msg['ts'], limit=1000).get('messages', [])
-            except SlackApiError:
+            replies = replies_by_ts.get(msg['ts'])
+            if replies is None:
                 continue
             
             # Skip first message (it's the parent), check replies only
@@ -103,7 +314,7 @@ class SlackMonitor:
                 reactions = reply.get('reactions', [])
                 if any(r.get('name') == 'white_check_mark' for r in reactions):
                     name = self._get_user_name(reply['user'])
-                    scores[name] = scores.get(name, 0) + 1
+                    scores[name] += 1
         
         # Sort by score descending (highest first)
-        return dict(sorted(scores.items(), key=lambda x: x[1], reverse=True))
+        return dict(scores.most_common())